@@ -0,0 +1,332 @@
+"""
+Cross-user analytics store for TFL Wrapped.
+
+Every processed upload is anonymized and appended to two partitioned Parquet
+datasets (one directory per upload day):
+- journeys: one row per journey with only the hour, origin station and
+  inferred line, shuffled and with no dates or per-user ID
+- uploads: one row per upload with the summary metrics users are ranked on
+
+The two are written to separately named files, so a summary cannot be joined
+back to its journeys. Re-uploads of the same statement are skipped using a
+content hash. A separate aggregation job map-reduces the partitions over a
+process pool and writes precomputed network-wide stats, which the API uses
+to rank a user's summary against everyone else's.
+
+Run the aggregation job with:
+    python analytics_store.py [--workers N]
+"""
+
+import argparse
+import json
+import os
+import uuid
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Any, Optional
+import pandas as pd
+
+from trip_chaining import split_journey_stations
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), "analytics")
+JOURNEYS_DIR = os.path.join(STORE_DIR, "journeys")
+UPLOADS_DIR = os.path.join(STORE_DIR, "uploads")
+SEEN_DIR = os.path.join(STORE_DIR, "seen")
+STATS_FILE = os.path.join(STORE_DIR, "stats.json")
+
+# Summary fields from compute_wrapped_metrics that users are ranked on
+RANKED_METRICS = [
+    "total_journeys",
+    "total_spent",
+    "average_cost",
+    "average_spend_per_day",
+    "total_time_minutes",
+]
+
+PERCENTILES = list(range(101))
+
+_stats_cache: Dict[str, Any] = {"mtime": None, "stats": None}
+
+
+def anonymize_journeys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce a processed journey DataFrame to what the network views need:
+    the hour, origin station and inferred line of each journey. Dates and
+    destinations are dropped so no dated history or home to work pairs are
+    kept, and rows are shuffled to lose their order.
+    """
+    stations = split_journey_stations(df)
+
+    anonymized = pd.DataFrame(
+        {
+            "Hour": pd.to_numeric(df["Hour"], errors="coerce").astype("Int64"),
+            "Origin": stations["Origin"],
+            "Line": (
+                df["inferred_line"].astype(str)
+                if "inferred_line" in df.columns
+                else "Unknown"
+            ),
+        }
+    )
+
+    return anonymized.sample(frac=1).reset_index(drop=True)
+
+
+def summarize_upload(summary: Dict[str, Any]) -> pd.DataFrame:
+    """
+    One row holding the ranked metrics from a compute_wrapped_metrics summary.
+    """
+    return pd.DataFrame(
+        [{metric: summary.get(metric) for metric in RANKED_METRICS}],
+        dtype="float64",
+    )
+
+
+def claim_upload(content_hash: str) -> bool:
+    """
+    Record a content hash, returning False if it has been stored before.
+    Creating the marker file is atomic, so concurrent re-uploads of the
+    same statement only count once.
+    """
+    os.makedirs(SEEN_DIR, exist_ok=True)
+    try:
+        fd = os.open(
+            os.path.join(SEEN_DIR, content_hash), os.O_CREAT | os.O_EXCL | os.O_WRONLY
+        )
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _partition_dir(dataset_dir: str, upload_date: date) -> str:
+    partition = os.path.join(dataset_dir, f"upload_date={upload_date.isoformat()}")
+    os.makedirs(partition, exist_ok=True)
+    return partition
+
+
+def append_upload(
+    df: pd.DataFrame,
+    summary: Dict[str, Any],
+    content_hash: str,
+    upload_date: Optional[date] = None,
+) -> bool:
+    """
+    Anonymize a processed upload and write it to today's partitions.
+
+    Args:
+        df: Processed journey DataFrame
+        summary: The 'summary' section of compute_wrapped_metrics for df
+        content_hash: SHA-256 of the uploaded bytes, used to skip repeat
+            uploads
+
+    Returns:
+        True if the upload was stored, False if it was a duplicate
+    """
+    if not claim_upload(content_hash):
+        return False
+
+    upload_date = upload_date or date.today()
+
+    try:
+        journeys_path = os.path.join(
+            _partition_dir(JOURNEYS_DIR, upload_date), f"{uuid.uuid4().hex}.parquet"
+        )
+        anonymize_journeys(df).to_parquet(journeys_path, index=False)
+
+        uploads_path = os.path.join(
+            _partition_dir(UPLOADS_DIR, upload_date), f"{uuid.uuid4().hex}.parquet"
+        )
+        summarize_upload(summary).to_parquet(uploads_path, index=False)
+    except Exception:
+        # Release the hash so a later re-upload can be stored
+        os.remove(os.path.join(SEEN_DIR, content_hash))
+        raise
+
+    return True
+
+
+def list_partitions() -> List[str]:
+    """
+    Partition names (upload_date=YYYY-MM-DD) present in either dataset.
+    """
+    names = set()
+    for dataset_dir in [JOURNEYS_DIR, UPLOADS_DIR]:
+        if os.path.isdir(dataset_dir):
+            names.update(
+                name
+                for name in os.listdir(dataset_dir)
+                if name.startswith("upload_date=")
+            )
+
+    return sorted(names)
+
+
+def _read_partition(dataset_dir: str, partition: str) -> pd.DataFrame:
+    partition_dir = os.path.join(dataset_dir, partition)
+    if not os.path.isdir(partition_dir):
+        return pd.DataFrame()
+
+    files = [
+        os.path.join(partition_dir, name)
+        for name in os.listdir(partition_dir)
+        if name.endswith(".parquet")
+    ]
+    if not files:
+        return pd.DataFrame()
+
+    return pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+
+
+def aggregate_partition(partition: str) -> Dict[str, Any]:
+    """
+    Map step: compute partial aggregates for a single upload day.
+    """
+    journeys = _read_partition(JOURNEYS_DIR, partition)
+    uploads = _read_partition(UPLOADS_DIR, partition)
+
+    if journeys.empty:
+        station_hours = pd.Series(dtype="int64")
+        lines = pd.Series(dtype="int64")
+    else:
+        station_hours = (
+            journeys.dropna(subset=["Origin", "Hour"])
+            .groupby(["Hour", "Origin"])
+            .size()
+        )
+        lines = journeys[~journeys["Line"].isin(["Bus", "Unknown"])][
+            "Line"
+        ].value_counts()
+
+    return {"station_hours": station_hours, "lines": lines, "uploads": uploads}
+
+
+def merge_aggregates(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce step: combine partition aggregates into network-wide stats with
+    precomputed percentile breakpoints for each ranked metric.
+    """
+    station_hours = pd.concat([p["station_hours"] for p in partials])
+    lines = pd.concat([p["lines"] for p in partials])
+    uploads = pd.concat([p["uploads"] for p in partials])
+
+    if len(station_hours) > 0:
+        station_hours = station_hours.groupby(level=[0, 1]).sum()
+    if len(lines) > 0:
+        lines = lines.groupby(level=0).sum().sort_values(ascending=False)
+
+    busiest_stations_by_hour = []
+    for hour, counts in station_hours.groupby(level=0):
+        top = counts.droplevel(0).sort_values(ascending=False).head(3)
+        busiest_stations_by_hour.append(
+            {
+                "hour": int(hour),
+                "stations": [
+                    {"station": station, "count": int(count)}
+                    for station, count in top.items()
+                ],
+            }
+        )
+
+    percentiles = {}
+    for metric in RANKED_METRICS:
+        if metric in uploads.columns and uploads[metric].notna().any():
+            values = uploads[metric].dropna()
+            breakpoints = values.quantile([p / 100 for p in PERCENTILES])
+            percentiles[metric] = [round(float(v), 2) for v in breakpoints]
+        else:
+            percentiles[metric] = []
+
+    return {
+        "total_uploads": int(len(uploads)),
+        "percentiles": percentiles,
+        "network": {
+            "busiest_stations_by_hour": busiest_stations_by_hour,
+            "top_lines": [
+                {"line": line, "count": int(count)}
+                for line, count in lines.head(10).items()
+            ],
+            "average_total_spent": (
+                round(float(uploads["total_spent"].mean()), 2)
+                if len(uploads) > 0
+                else 0.0
+            ),
+            "average_spend_per_day": (
+                round(float(uploads["average_spend_per_day"].mean()), 2)
+                if len(uploads) > 0
+                else 0.0
+            ),
+        },
+    }
+
+
+def run_aggregation(workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Aggregate all partitions in parallel and write the stats file.
+    """
+    partitions = list_partitions()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partials = list(executor.map(aggregate_partition, partitions))
+
+    if partials:
+        stats = merge_aggregates(partials)
+    else:
+        stats = {"total_uploads": 0, "percentiles": {}, "network": {}}
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_path = f"{STATS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, STATS_FILE)
+
+    return stats
+
+
+def load_stats() -> Optional[Dict[str, Any]]:
+    """
+    Load precomputed stats, re-reading the file only when the job rewrites it.
+    """
+    if not os.path.exists(STATS_FILE):
+        return None
+
+    mtime = os.path.getmtime(STATS_FILE)
+    if _stats_cache["mtime"] != mtime:
+        with open(STATS_FILE, "r") as f:
+            _stats_cache["stats"] = json.load(f)
+        _stats_cache["mtime"] = mtime
+
+    return _stats_cache["stats"]
+
+
+def percentile_rank(value: float, breakpoints: List[float]) -> Optional[int]:
+    """
+    Percentile of value among all uploads. Values tied with breakpoints take
+    the middle of the tied range. Breakpoints always have 101 entries, so
+    this is constant time regardless of the number of uploads.
+    """
+    if not breakpoints or value is None:
+        return None
+
+    position = (bisect_left(breakpoints, value) + bisect_right(breakpoints, value)) / 2
+    return int(round(position / len(breakpoints) * 100))
+
+
+def rank_summary(summary: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    percentiles = stats.get("percentiles", {})
+
+    return {
+        metric: percentile_rank(summary[metric], percentiles.get(metric, []))
+        for metric in RANKED_METRICS
+        if summary.get(metric) is not None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate TFL Wrapped network stats")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    stats = run_aggregation(args.workers)
+    print(f"Aggregated {stats['total_uploads']} uploads")
@@ -1,10 +1,17 @@
 import pandas as pd
-from typing import Tuple, Literal
+import csv
+from typing import Tuple, Literal, Iterable
 from datetime import datetime
 
 
 def detect_csv_format(df: pd.DataFrame) -> Literal["contactless", "oyster"]:
-    columns = [col.lower().strip() for col in df.columns]
+    return detect_format_from_columns(df.columns)
+
+
+def detect_format_from_columns(
+    columns: Iterable[str],
+) -> Literal["contactless", "oyster"]:
+    columns = [str(col).lower().strip() for col in columns]
 
     if "start time" in columns and "journey/action" in columns:
         return "oyster"
@@ -19,6 +26,36 @@ def detect_csv_format(df: pd.DataFrame) -> Literal["contactless", "oyster"]:
     return "contactless"
 
 
+def sniff_csv_header(head: bytes) -> Literal["contactless", "oyster"]:
+    """
+    Validate the header row from the first bytes of an upload without
+    parsing the rest of the file.
+
+    Raises:
+        ValueError: if the bytes are not text or the header is missing the
+            columns both statement formats need
+    """
+    if b"\x00" in head:
+        raise ValueError("File does not appear to be a text CSV")
+
+    text = head.decode("utf-8-sig", errors="replace")
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("CSV file appears to be empty")
+
+    header = next(csv.reader([lines[0]], skipinitialspace=True))
+    columns = [col.lower().strip() for col in header]
+
+    if "date" not in columns or not (
+        "journey" in columns or "journey/action" in columns
+    ):
+        raise ValueError(
+            "CSV header is missing Date and Journey columns from a TfL statement"
+        )
+
+    return detect_format_from_columns(header)
+
+
 def parse_contactless_csv(df: pd.DataFrame) -> pd.DataFrame:
     result = df.copy()
     result["Date"] = pd.to_datetime(result["Date"], format="%d/%m/%Y", errors="coerce")
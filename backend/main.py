@@ -1,15 +1,43 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Any
+from fastapi.responses import StreamingResponse, JSONResponse
+from typing import Dict, List, Any, Iterator, Optional
+from pydantic import BaseModel
 import pandas as pd
 from datetime import datetime
 import os
-import shutil
+import json
+import logging
 from line_inference import infer_line_for_journey
 from csv_parser import load_and_normalize_csv
+from trip_chaining import chain_trips, compute_trip_metrics
+from analytics_store import append_upload, load_stats, rank_summary
+from upload_validation import (
+    check_content_length,
+    validate_and_save_upload,
+    UploadValidationError,
+)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="TFL Wrapped API", version="1.0.0")
 
+UPLOAD_PATHS = {"/upload", "/upload/stream"}
+
+
+# FastAPI reads the whole form before running route dependencies, so the
+# Content-Length check has to happen in middleware to skip reading the body.
+# Registered before CORSMiddleware so rejections still get CORS headers.
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        try:
+            check_content_length(request.headers.get("content-length"))
+        except UploadValidationError as e:
+            return JSONResponse(status_code=e.status_code, content={"detail": str(e)})
+
+    return await call_next(request)
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,20 +48,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 CSV_PATH = os.path.join(os.path.dirname(__file__), "journeys.csv")
 
+# Rows per line inference batch when streaming progress
+INFERENCE_CHUNK_SIZE = 250
+
 
 def load_and_process_data(csv_path: str = None) -> pd.DataFrame:
     path = csv_path or CSV_PATH
 
     df = load_and_normalize_csv(path)
+    df = chain_trips(df)
     df = infer_line_for_journey(df)
 
     return df
 
 
+def compute_line_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+    if "inferred_line" in df.columns:
+        line_counts = (
+            df[df["inferred_line"].isin(["Bus", "Unknown"]) == False]["inferred_line"]
+            .value_counts()
+            .head(5)
+        )
+        top_lines = [
+            {"line": line, "count": int(count)} for line, count in line_counts.items()
+        ]
+
+        # Confidence breakdown
+        confidence_counts = df["confidence"].value_counts().to_dict()
+        confidence_breakdown = {
+            "high": int(confidence_counts.get("high", 0)),
+            "medium": int(confidence_counts.get("medium", 0)),
+            "low": int(confidence_counts.get("low", 0)),
+        }
+    else:
+        top_lines = []
+        confidence_breakdown = {"high": 0, "medium": 0, "low": 0}
+
+    return {"top_lines": top_lines, "confidence_breakdown": confidence_breakdown}
+
+
 def compute_wrapped_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     total_journeys = len(df)
     total_spent = df["Charge_Abs"].sum()
@@ -98,26 +156,9 @@ def compute_wrapped_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     daily_journey_counts.columns = ["date", "count"]
     busiest_day = daily_journey_counts.loc[daily_journey_counts["count"].idxmax()]
 
-    if "inferred_line" in df.columns:
-        line_counts = (
-            df[df["inferred_line"].isin(["Bus", "Unknown"]) == False]["inferred_line"]
-            .value_counts()
-            .head(5)
-        )
-        top_lines = [
-            {"line": line, "count": int(count)} for line, count in line_counts.items()
-        ]
+    line_metrics = compute_line_metrics(df)
 
-        # Confidence breakdown
-        confidence_counts = df["confidence"].value_counts().to_dict()
-        confidence_breakdown = {
-            "high": int(confidence_counts.get("high", 0)),
-            "medium": int(confidence_counts.get("medium", 0)),
-            "low": int(confidence_counts.get("low", 0)),
-        }
-    else:
-        top_lines = []
-        confidence_breakdown = {"high": 0, "medium": 0, "low": 0}
+    trips = compute_trip_metrics(df)
 
     return {
         "summary": {
@@ -145,8 +186,9 @@ def compute_wrapped_metrics(df: pd.DataFrame) -> Dict[str, Any]:
             "date": busiest_day["date"].strftime("%Y-%m-%d"),
             "journey_count": int(busiest_day["count"]),
         },
-        "top_lines": top_lines,
-        "confidence_breakdown": confidence_breakdown,
+        "trips": trips,
+        "top_lines": line_metrics["top_lines"],
+        "confidence_breakdown": line_metrics["confidence_breakdown"],
         "line_inference_note": "Line data is inferred probabilistically due to limitations in available journey history.",
     }
 
@@ -161,15 +203,50 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/upload")
-async def upload_csv(file: UploadFile = File(...)):
+def save_upload(file: UploadFile) -> Dict[str, Any]:
+    """
+    Run fast-fail validation on an upload and save it to CSV_PATH.
+    """
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="File must be a CSV file")
 
+    try:
+        return validate_and_save_upload(file.file, CSV_PATH)
+    except UploadValidationError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+
+def store_upload_stats(
+    df: pd.DataFrame, content_hash: str, summary: Optional[Dict[str, Any]] = None
+) -> None:
+    # Network stats are best-effort and must not fail the upload, including
+    # when the summary metrics cannot be computed for this file
+    try:
+        if summary is None:
+            summary = compute_wrapped_metrics(df)["summary"]
+        append_upload(df, summary, content_hash)
+    except Exception:
+        logger.exception("Failed to store upload for network stats")
+
+
+def server_timing(validation: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "Server-Timing": (
+            f"validate;dur={validation['validate_ms']}, "
+            f"save;dur={validation['save_ms']}"
+        )
+    }
+
+
+@app.post("/upload")
+async def upload_csv(response: Response, file: UploadFile = File(...)):
+    validation = save_upload(file)
+    response.headers.update(server_timing(validation))
+
     try:
         file_path = CSV_PATH
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
 
         try:
             df = load_and_process_data(file_path)
@@ -180,6 +257,8 @@ async def upload_csv(file: UploadFile = File(...)):
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)}")
 
+        store_upload_stats(df, validation["sha256"])
+
         return {
             "status": "success",
             "message": "CSV file uploaded and processed successfully",
@@ -192,6 +271,82 @@ async def upload_csv(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
+def ndjson_event(event: str, **fields: Any) -> str:
+    return json.dumps({"event": event, **fields}) + "\n"
+
+
+def stream_upload_events(
+    df: pd.DataFrame, filename: str, validation: Dict[str, Any]
+) -> Iterator[str]:
+    """
+    Process a parsed upload, yielding NDJSON events as each stage finishes.
+
+    Cheap sections (summary, spending, patterns, trips) are sent first; line
+    inference runs in chunks with progress events and its sections follow
+    once it completes.
+    """
+    total_rows = len(df)
+    # Stage names reported in error events, so a failure is reported against
+    # the step that raised it
+    stage = "computing_metrics"
+    try:
+        yield ndjson_event(
+            "progress",
+            stage="validated",
+            validate_ms=validation["validate_ms"],
+            save_ms=validation["save_ms"],
+        )
+        yield ndjson_event("progress", stage="parsed", rows=total_rows)
+
+        df = chain_trips(df)
+        metrics = compute_wrapped_metrics(df)
+        yield ndjson_event("metrics", partial=True, data=metrics)
+
+        stage = "inferring_lines"
+        chunks = []
+        for start in range(0, total_rows, INFERENCE_CHUNK_SIZE):
+            chunks.append(
+                infer_line_for_journey(df.iloc[start : start + INFERENCE_CHUNK_SIZE])
+            )
+            yield ndjson_event(
+                "progress",
+                stage="inferring_lines",
+                completed=min(start + INFERENCE_CHUNK_SIZE, total_rows),
+                total=total_rows,
+            )
+        df = pd.concat(chunks)
+
+        yield ndjson_event("section", name="lines", data=compute_line_metrics(df))
+
+        stage = "storing"
+        store_upload_stats(df, validation["sha256"], metrics["summary"])
+
+        yield ndjson_event("complete", filename=filename, journey_count=total_rows)
+    except Exception as e:
+        detail = f"Error while {stage.replace('_', ' ')}: {str(e)}"
+        yield ndjson_event("error", stage=stage, detail=detail)
+
+
+@app.post("/upload/stream")
+async def upload_csv_stream(file: UploadFile = File(...)):
+    validation = save_upload(file)
+
+    # Parse before streaming, so the generator never re-reads CSV_PATH after
+    # another upload may have replaced it
+    try:
+        df = load_and_normalize_csv(CSV_PATH)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)}")
+    if df.empty:
+        raise HTTPException(status_code=400, detail="CSV file appears to be empty")
+
+    return StreamingResponse(
+        stream_upload_events(df, file.filename, validation),
+        media_type="application/x-ndjson",
+        headers=server_timing(validation),
+    )
+
+
 @app.get("/wrapped")
 def get_wrapped():
     # Check if CSV file exists
@@ -208,3 +363,39 @@ def get_wrapped():
         raise HTTPException(
             status_code=500, detail=f"Error processing journey data: {str(e)}"
         )
+
+
+class CompareSummary(BaseModel):
+    total_journeys: Optional[float] = None
+    total_spent: Optional[float] = None
+    average_cost: Optional[float] = None
+    average_spend_per_day: Optional[float] = None
+    total_time_minutes: Optional[float] = None
+
+
+class CompareRequest(BaseModel):
+    summary: CompareSummary
+
+
+@app.post("/compare")
+def compare(request: CompareRequest):
+    """
+    Rank a user's summary against all stored uploads.
+
+    Expects the /wrapped response, or at least its summary section:
+        {"summary": {"total_journeys": 39, "total_spent": 162.4, ...}}
+    Ranked fields are optional and other fields are ignored.
+    """
+    stats = load_stats()
+    if not stats or stats.get("total_uploads", 0) == 0:
+        raise HTTPException(
+            status_code=404, detail="No network stats have been computed yet"
+        )
+
+    summary = request.summary.model_dump()
+
+    return {
+        "total_uploads": stats["total_uploads"],
+        "percentiles": rank_summary(summary, stats),
+        "network": stats["network"],
+    }
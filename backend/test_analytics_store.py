@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+import analytics_store
+from analytics_store import (
+    aggregate_partition,
+    append_upload,
+    list_partitions,
+    merge_aggregates,
+    percentile_rank,
+)
+from main import load_and_process_data, compute_wrapped_metrics
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    for name in ["STORE_DIR", "JOURNEYS_DIR", "UPLOADS_DIR", "SEEN_DIR"]:
+        monkeypatch.setattr(analytics_store, name, str(tmp_path / name.lower()))
+    monkeypatch.setattr(analytics_store, "STATS_FILE", str(tmp_path / "stats.json"))
+    return tmp_path
+
+
+@pytest.fixture
+def processed():
+    df = load_and_process_data()
+    return df, compute_wrapped_metrics(df)["summary"]
+
+
+def test_percentile_rank_without_breakpoints():
+    assert percentile_rank(10.0, []) is None
+    assert percentile_rank(None, list(range(101))) is None
+
+
+def test_percentile_rank_ties_take_the_midpoint():
+    assert percentile_rank(5.0, [5.0] * 101) == 50
+
+
+def test_percentile_rank_outside_range():
+    breakpoints = [float(p) for p in range(101)]
+
+    assert percentile_rank(-1.0, breakpoints) == 0
+    assert percentile_rank(500.0, breakpoints) == 100
+    assert percentile_rank(50.0, breakpoints) == 50
+
+
+def test_merge_aggregates_with_only_empty_partitions(store):
+    stats = merge_aggregates([aggregate_partition("upload_date=2025-05-01")])
+
+    assert stats["total_uploads"] == 0
+    assert stats["network"]["busiest_stations_by_hour"] == []
+    assert stats["network"]["top_lines"] == []
+    assert all(breakpoints == [] for breakpoints in stats["percentiles"].values())
+
+
+def test_merge_aggregates_skips_empty_partitions(store, processed):
+    df, summary = processed
+    append_upload(df, summary, "a" * 64)
+
+    partials = [aggregate_partition(name) for name in list_partitions()]
+    partials.append(aggregate_partition("upload_date=2025-05-01"))
+    stats = merge_aggregates(partials)
+
+    assert stats["total_uploads"] == 1
+    assert stats["percentiles"]["total_spent"] == [summary["total_spent"]] * 101
+    assert stats["network"]["top_lines"]
+
+
+def test_append_upload_skips_repeat_uploads(store, processed):
+    df, summary = processed
+
+    assert append_upload(df, summary, "a" * 64)
+    assert not append_upload(df, summary, "a" * 64)
+    assert append_upload(df, summary, "b" * 64)
+
+    uploads = pd.concat(
+        aggregate_partition(name)["uploads"] for name in list_partitions()
+    )
+    assert len(uploads) == 2
@@ -0,0 +1,124 @@
+from csv_parser import load_and_normalize_csv
+from trip_chaining import chain_trips, compute_trip_metrics
+
+HEADER = "Date,Time,Journey,Charge (GBP),Capped,Notes\n"
+
+
+def load_trips(tmp_path, rows):
+    path = tmp_path / "journeys.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    return chain_trips(load_and_normalize_csv(str(path)))
+
+
+def trip_ids_by_start(df):
+    ordered = df.sort_values(["Date", "Start_Time"])
+    return ordered["Trip_ID"].tolist()
+
+
+def test_bus_then_rail_is_one_trip(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            '02/05/2025,08:11,"Bus Journey, Route E8",-1.75,N,',
+            "02/05/2025,08:48 - 09:10,Ealing Broadway to Tottenham Court Road,-3.80,N,",
+        ],
+    )
+
+    ids = trip_ids_by_start(df)
+    assert ids[0] == ids[1]
+    assert sorted(df["Leg_Number"]) == [1, 2]
+
+
+def test_rail_interchange_is_one_trip(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            "10/05/2025,13:07 - 13:29,Northfields to Earls Court,-2.10,N,",
+            "10/05/2025,13:29 - 13:37,Earls Court to High Street Kensington,-2.80,N,",
+        ],
+    )
+
+    ids = trip_ids_by_start(df)
+    assert ids[0] == ids[1]
+    assert compute_trip_metrics(df)["average_door_to_door_minutes"] == 30.0
+
+
+def test_out_and_back_is_two_trips(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            "05/05/2025,08:00 - 08:20,Brentford to Ealing Broadway,-2.10,N,",
+            "05/05/2025,08:40 - 09:00,Ealing Broadway to Brentford,-2.10,N,",
+        ],
+    )
+
+    ids = trip_ids_by_start(df)
+    assert ids[0] != ids[1]
+
+    metrics = compute_trip_metrics(df)
+    assert metrics["total_trips"] == 2
+    assert metrics["return_trips"] == 1
+
+
+def test_leg_ending_after_midnight_chains_into_next_day(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            "16/05/2025,23:40 - 00:05,Tottenham Court Road to Ealing Broadway,-2.80,N,",
+            '17/05/2025,00:15,"Bus Journey, Route E2",-1.75,N,',
+        ],
+    )
+
+    ids = trip_ids_by_start(df)
+    assert ids[0] == ids[1]
+    assert compute_trip_metrics(df)["average_door_to_door_minutes"] == 35.0
+
+
+def test_hopper_savings_skip_capped_legs(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            '16/05/2025,21:37,"Bus Journey, Route 27",-1.75,N,',
+            "16/05/2025,22:06 - 22:19,Hammersmith to Northfields,-0.40,Y,",
+            '16/05/2025,22:25,"Bus Journey, Route E2",0.00,N,',
+            '17/05/2025,08:10,"Bus Journey, Route E2",-1.75,N,',
+            '17/05/2025,08:30,"Bus Journey, Route E8",0.00,Y,',
+        ],
+    )
+
+    metrics = compute_trip_metrics(df)
+    assert metrics["total_trips"] == 2
+    assert metrics["hopper_savings"] == 1.75
+
+
+def test_trip_closes_after_hopper_window(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            '05/05/2025,08:00,"Bus Journey, Route E2",-1.75,N,',
+            '05/05/2025,08:50,"Bus Journey, Route E2",-1.75,N,',
+            '05/05/2025,09:40,"Bus Journey, Route E2",-1.75,N,',
+            '05/05/2025,10:30,"Bus Journey, Route E2",-1.75,N,',
+            '05/05/2025,11:20,"Bus Journey, Route E2",-1.75,N,',
+        ],
+    )
+
+    metrics = compute_trip_metrics(df)
+    assert metrics["total_trips"] == 3
+    assert df["Leg_Number"].max() == 2
+    assert metrics["hopper_savings"] == 0.0
+
+
+def test_rail_bus_rail_chain_is_bounded_by_window(tmp_path):
+    df = load_trips(
+        tmp_path,
+        [
+            "05/05/2025,08:00 - 08:20,Brentford to Ealing Broadway,-2.10,N,",
+            '05/05/2025,08:30,"Bus Journey, Route E2",-1.75,N,',
+            "05/05/2025,09:10 - 09:50,Northfields to Earls Court,-2.10,N,",
+        ],
+    )
+
+    ids = trip_ids_by_start(df)
+    assert ids[0] == ids[1]
+    assert ids[1] != ids[2]
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import upload_validation
+from upload_validation import (
+    check_content_length,
+    validate_and_save_upload,
+    UploadValidationError,
+)
+
+VALID_CSV = (
+    b"Date,Time,Journey,Charge (GBP),Capped,Notes\n"
+    b"01/05/2025,08:04 - 08:59,Brentford to Tottenham Court Road,-7.30,N,\n"
+    b"01/05/2025,17:56 - 18:54,Tottenham Court Road to Brentford,-5.50,Y,\n"
+)
+
+
+@pytest.fixture
+def previous_upload(tmp_path):
+    dest = tmp_path / "journeys.csv"
+    dest.write_bytes(b"previous upload")
+    return dest
+
+
+def assert_rejected(source, dest, status_code):
+    with pytest.raises(UploadValidationError) as error:
+        validate_and_save_upload(io.BytesIO(source), str(dest))
+
+    assert error.value.status_code == status_code
+    assert dest.read_bytes() == b"previous upload"
+    assert list(dest.parent.iterdir()) == [dest]
+
+
+def test_valid_upload_is_saved(previous_upload):
+    result = validate_and_save_upload(io.BytesIO(VALID_CSV), str(previous_upload))
+
+    assert result["format"] == "contactless"
+    assert result["rows"] == 2
+    assert previous_upload.read_bytes() == VALID_CSV
+
+
+def test_binary_upload_is_rejected(previous_upload):
+    assert_rejected(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", previous_upload, 400)
+
+
+@pytest.mark.parametrize(
+    "header",
+    [b"Time,Journey,Charge (GBP)\n", b"Date,Time,Charge (GBP)\n"],
+)
+def test_missing_date_or_journey_header_is_rejected(previous_upload, header):
+    assert_rejected(header + b"01/05/2025,08:04,-7.30\n", previous_upload, 400)
+
+
+def test_byte_limit_is_enforced_mid_copy(previous_upload, monkeypatch):
+    monkeypatch.setattr(upload_validation, "CHUNK_BYTES", 64)
+    monkeypatch.setattr(upload_validation, "MAX_UPLOAD_BYTES", len(VALID_CSV) - 1)
+
+    assert_rejected(VALID_CSV, previous_upload, 413)
+
+
+def test_row_limit_is_enforced_mid_copy(previous_upload, monkeypatch):
+    monkeypatch.setattr(upload_validation, "MAX_UPLOAD_ROWS", 1)
+
+    assert_rejected(VALID_CSV, previous_upload, 413)
+
+
+def test_content_length_is_required():
+    with pytest.raises(UploadValidationError) as error:
+        check_content_length(None)
+
+    assert error.value.status_code == 411
+
+
+def test_content_length_over_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(upload_validation, "MAX_UPLOAD_BYTES", 1024)
+
+    check_content_length(str(1024 + upload_validation.MULTIPART_OVERHEAD_BYTES))
+    with pytest.raises(UploadValidationError) as error:
+        check_content_length(str(1025 + upload_validation.MULTIPART_OVERHEAD_BYTES))
+
+    assert error.value.status_code == 413
+
+
+def test_oversized_upload_is_rejected_before_the_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_validation, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(main, "CSV_PATH", str(tmp_path / "journeys.csv"))
+    client = TestClient(main.app)
+
+    response = client.post(
+        "/upload",
+        files={"file": ("journeys.csv", VALID_CSV * 1000, "text/csv")},
+    )
+
+    assert response.status_code == 413
+    assert not (tmp_path / "journeys.csv").exists()
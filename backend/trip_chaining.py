@@ -0,0 +1,225 @@
+"""
+Trip chaining for TFL Wrapped.
+
+Each row of the normalized journey frame is a single leg (one tap-in/tap-out
+or one bus tap). This module links consecutive legs into door-to-door trips:
+- A bus leg and the next leg within the Hopper window
+- A rail leg and the next rail leg starting where it finished (out-of-station
+  interchange)
+
+Chaining is done with shifted-column comparisons on a chronologically sorted
+frame, so trip IDs are assigned in a single vectorized pass.
+"""
+
+from typing import Dict, Any, Tuple
+import pandas as pd
+
+# Hopper fare: unlimited bus and tram journeys within 60 minutes of first tap
+HOPPER_WINDOW_MINUTES = 60
+
+# Longest wait after tapping out of a rail leg that still counts as changing
+INTERCHANGE_GAP_MINUTES = 20
+
+# Standard single bus fare, used to value legs made free by the Hopper fare
+BUS_FARE = 1.75
+
+
+def split_journey_stations(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Split "Station A to Station B" journeys into Origin and Destination.
+    Bus legs have no stations and get empty values.
+    """
+    journeys = df["Journey"].fillna("").astype(str)
+    is_bus = df["Journey_Type"] == "Bus"
+
+    parts = journeys.str.split(" to ", n=1, expand=True)
+    if len(parts.columns) < 2:
+        parts[1] = None
+
+    # Drop line annotations, e.g. "Hammersmith (District, Piccadilly lines)"
+    origin = parts[0].str.replace(r"\s*\(.*?\)", "", regex=True).str.strip()
+    destination = parts[1].str.replace(r"\s*\(.*?\)", "", regex=True).str.strip()
+
+    return pd.DataFrame(
+        {
+            "Origin": origin.where(~is_bus & parts[1].notna()),
+            "Destination": destination.where(~is_bus),
+        },
+        index=df.index,
+    )
+
+
+def _leg_times(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """
+    Combine Date with Start_Time/End_Time into full timestamps.
+    Legs without a tap-out (buses) end when they start.
+    """
+    day = df["Date"].dt.normalize()
+    start = day + pd.to_timedelta(
+        df["Start_Time"].astype(str) + ":00", errors="coerce"
+    )
+    end = day + pd.to_timedelta(df["End_Time"].astype(str) + ":00", errors="coerce")
+    # Journeys finishing after midnight
+    end = end.where(~(end < start), end + pd.Timedelta(days=1))
+
+    return start, end.fillna(start)
+
+
+def chain_trips(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Group journey legs into door-to-door trips.
+
+    A leg continues the previous one when it starts within
+    INTERCHANGE_GAP_MINUTES of a rail leg finishing, or within
+    HOPPER_WINDOW_MINUTES of a bus tap, since bus legs have no tap-out. Rail
+    to rail legs additionally require the first leg's destination to be the
+    next leg's origin, without heading back to the first leg's origin. Every
+    leg of a trip must start within HOPPER_WINDOW_MINUTES of the trip's first
+    leg, so a chain of connecting legs cannot grow indefinitely.
+
+    Args:
+        df: Normalized DataFrame from load_and_normalize_csv
+
+    Returns:
+        DataFrame with added 'Trip_ID', 'Leg_Number' and 'Trip_Start' columns,
+        in the same row order as the input
+    """
+    df = df.copy()
+
+    if df.empty:
+        df["Trip_ID"] = pd.Series(dtype="int64")
+        df["Leg_Number"] = pd.Series(dtype="int64")
+        df["Trip_Start"] = pd.Series(dtype="datetime64[ns]")
+        return df
+
+    legs = split_journey_stations(df)
+    legs["Start"], legs["End"] = _leg_times(df)
+    legs["Is_Bus"] = df["Journey_Type"] == "Bus"
+
+    legs = legs.sort_values(["Start", "End"], kind="stable")
+
+    prev = legs.shift(1)
+    prev_is_bus = prev["Is_Bus"].fillna(False).astype(bool)
+    gap_minutes = (legs["Start"] - prev["End"]).dt.total_seconds() / 60
+
+    # The gap alone bounds the window, so legs ending after midnight still
+    # chain into the next day's first leg
+    max_gap = prev_is_bus.map(
+        {True: HOPPER_WINDOW_MINUTES, False: INTERCHANGE_GAP_MINUTES}
+    )
+    within_window = (gap_minutes >= 0) & (gap_minutes <= max_gap)
+    involves_bus = legs["Is_Bus"] | prev_is_bus
+    # Going straight back to where the previous leg started is a return
+    # journey, not an interchange
+    interchange = (
+        legs["Origin"].notna()
+        & (legs["Origin"].str.lower() == prev["Destination"].str.lower())
+        & (legs["Destination"].str.lower() != prev["Origin"].str.lower())
+    )
+
+    new_trip = ~(within_window & (involves_bus | interchange))
+
+    # Split chains running past the window from their first leg. Each pass
+    # starts a new trip at the first overflowing leg of every trip, so the
+    # loop runs once per extra trip in the longest chain, not once per row.
+    while True:
+        trip_start = legs["Start"].where(new_trip).ffill()
+        minutes_in = (legs["Start"] - trip_start).dt.total_seconds() / 60
+        overflow = minutes_in > HOPPER_WINDOW_MINUTES
+        if not overflow.any():
+            break
+        trip_id = new_trip.cumsum()
+        new_trip |= overflow & (overflow.groupby(trip_id).cumsum() == 1)
+
+    trip_id = new_trip.cumsum()
+
+    legs["Trip_ID"] = trip_id
+    legs["Leg_Number"] = legs.groupby(trip_id).cumcount() + 1
+    legs["Trip_Start"] = legs.groupby(trip_id)["Start"].transform("min")
+
+    # Index alignment restores the input row order
+    df["Trip_ID"] = legs["Trip_ID"]
+    df["Leg_Number"] = legs["Leg_Number"]
+    df["Trip_Start"] = legs["Trip_Start"]
+
+    return df
+
+
+def compute_trip_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute trip-level metrics from a DataFrame processed by chain_trips.
+
+    Returns:
+        Dict with trip counts, door-to-door time, cost per trip, return
+        trips and Hopper savings
+    """
+    if "Trip_ID" not in df.columns or df.empty:
+        return {
+            "total_trips": 0,
+            "multi_leg_trips": 0,
+            "average_door_to_door_minutes": 0.0,
+            "average_cost_per_trip": 0.0,
+            "return_trips": 0,
+            "hopper_savings": 0.0,
+        }
+
+    legs = split_journey_stations(df)
+    legs["Trip_ID"] = df["Trip_ID"]
+    legs["Leg_Number"] = df["Leg_Number"]
+    legs["Trip_Start"] = df["Trip_Start"]
+    legs["Charge_Abs"] = df["Charge_Abs"]
+    legs["Is_Bus"] = df["Journey_Type"] == "Bus"
+    legs["End"] = _leg_times(df)[1]
+
+    legs = legs.sort_values(["Trip_ID", "Leg_Number"])
+    grouped = legs.groupby("Trip_ID")
+
+    trips = pd.DataFrame(
+        {
+            "Start": grouped["Trip_Start"].first(),
+            "End": grouped["End"].max(),
+            "Legs": grouped.size(),
+            "Cost": grouped["Charge_Abs"].sum(),
+            "Origin": grouped["Origin"].first(),
+            "Destination": grouped["Destination"].last(),
+        }
+    )
+
+    door_to_door = (trips["End"] - trips["Start"]).dt.total_seconds() / 60
+    # Single bus taps have no measurable duration
+    door_to_door = door_to_door[door_to_door > 0]
+    multi_leg = trips["Legs"] > 1
+
+    # Out-and-back: a trip retracing the previous trip on the same day
+    prev = trips.shift(1)
+    same_day = trips["Start"].dt.normalize() == prev["Start"].dt.normalize()
+    return_trips = (
+        same_day
+        & trips["Origin"].notna()
+        & (trips["Origin"].str.lower() == prev["Destination"].str.lower())
+        & (trips["Destination"].str.lower() == prev["Origin"].str.lower())
+    )
+
+    # Free bus legs tapped within the Hopper window of the trip's first bus tap
+    bus_legs = legs[legs["Is_Bus"]]
+    first_bus_tap = bus_legs.groupby("Trip_ID")["End"].transform("min")
+    since_first_bus = (bus_legs["End"] - first_bus_tap).dt.total_seconds() / 60
+    hopper_legs = (
+        (bus_legs.groupby("Trip_ID").cumcount() > 0)
+        & (bus_legs["Charge_Abs"] == 0)
+        & (since_first_bus <= HOPPER_WINDOW_MINUTES)
+    )
+    if "Capped" in df.columns:
+        # Capped legs are free because of the daily cap, not the Hopper fare
+        hopper_legs &= df.loc[bus_legs.index, "Capped"] != "Y"
+
+    return {
+        "total_trips": int(len(trips)),
+        "multi_leg_trips": int(multi_leg.sum()),
+        "average_door_to_door_minutes": round(
+            float(door_to_door.mean()) if len(door_to_door) > 0 else 0.0, 1
+        ),
+        "average_cost_per_trip": round(float(trips["Cost"].mean()), 2),
+        "return_trips": int(return_trips.sum()),
+        "hopper_savings": round(float(hopper_legs.sum()) * BUS_FARE, 2),
+    }
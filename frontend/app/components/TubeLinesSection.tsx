@@ -7,6 +7,7 @@ import { WrappedData } from "../types";
 
 interface TubeLinesSectionProps {
   data: WrappedData;
+  loading?: boolean;
 }
 
 const LINE_COLORS: Record<string, string> = {
@@ -56,7 +57,10 @@ const getLineColor = (line: string): string => {
   return LINE_COLORS[line] || "bg-gray-600";
 };
 
-export default function TubeLinesSection({ data }: TubeLinesSectionProps) {
+export default function TubeLinesSection({
+  data,
+  loading = false,
+}: TubeLinesSectionProps) {
   const totalInferred =
     data.confidence_breakdown.high +
     data.confidence_breakdown.medium +
@@ -67,6 +71,20 @@ export default function TubeLinesSection({ data }: TubeLinesSectionProps) {
     return Math.round((value / totalInferred) * 100);
   };
 
+  if (loading) {
+    return (
+      <Section className="">
+        <div className="text-center">
+          <h2 className="text-5xl md:text-7xl font-bold mb-8 iridescent-text">
+            Your Tube Lines
+          </h2>
+          <div className="w-12 h-12 border-4 border-purple-400 border-t-transparent rounded-full animate-spin mx-auto mb-4"></div>
+          <p className="text-xl text-gray-600">Working out which lines you took...</p>
+        </div>
+      </Section>
+    );
+  }
+
   if (data.top_lines.length === 0) {
     return null;
   }
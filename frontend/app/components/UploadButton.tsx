@@ -2,19 +2,39 @@
 
 import { useState, useRef } from "react";
 import { motion, AnimatePresence } from "framer-motion";
-import { uploadCSV, fetchWrappedData } from "../lib/api";
+import { uploadCSVStream, UploadStreamEvent } from "../lib/api";
 import { WrappedData } from "../types";
 
 interface UploadButtonProps {
-  onUploadSuccess: (data: WrappedData) => void;
+  onUploadSuccess: (data: WrappedData, partial: boolean) => void;
   onUploadStart?: () => void;
+  onUploadProgress?: (message: string) => void;
+  onUploadError?: () => void;
 }
 
+const describeProgress = (event: UploadStreamEvent): string | null => {
+  if (event.event !== "progress") return null;
+
+  switch (event.stage) {
+    case "validated":
+      return "Reading your CSV...";
+    case "parsed":
+      return `Parsed ${event.rows} journeys`;
+    case "inferring_lines":
+      return `Inferring lines ${event.completed}/${event.total}`;
+    default:
+      return null;
+  }
+};
+
 export default function UploadButton({
   onUploadSuccess,
   onUploadStart,
+  onUploadProgress,
+  onUploadError,
 }: UploadButtonProps) {
   const [isUploading, setIsUploading] = useState(false);
+  const [progressMessage, setProgressMessage] = useState<string | null>(null);
   const [uploadError, setUploadError] = useState<string | null>(null);
   const [showSuccess, setShowSuccess] = useState(false);
   const fileInputRef = useRef<HTMLInputElement>(null);
@@ -36,10 +56,33 @@ export default function UploadButton({
     onUploadStart?.();
 
     try {
-      const result = await uploadCSV(file);
-      const newData = await fetchWrappedData();
-      window.scrollTo({ top: 0, behavior: "smooth" });
-      onUploadSuccess(newData);
+      // Render the cheap sections as soon as they arrive, then fill in
+      // the inferred line sections once they are ready
+      let newData: WrappedData | null = null;
+      let completed = false;
+      await uploadCSVStream(file, (event) => {
+        const message = describeProgress(event);
+        if (message) {
+          setProgressMessage(message);
+          onUploadProgress?.(message);
+        }
+
+        if (event.event === "metrics") {
+          newData = event.data;
+          window.scrollTo({ top: 0, behavior: "smooth" });
+          onUploadSuccess(newData, event.partial);
+        } else if (event.event === "section" && newData) {
+          newData = { ...newData, ...event.data };
+          onUploadSuccess(newData, true);
+        } else if (event.event === "complete" && newData) {
+          completed = true;
+          onUploadSuccess(newData, false);
+        }
+      });
+
+      if (!completed) {
+        throw new Error("Upload ended before processing finished");
+      }
 
       setShowSuccess(true);
       setTimeout(() => setShowSuccess(false), 3000);
@@ -48,8 +91,10 @@ export default function UploadButton({
         error instanceof Error ? error.message : "Failed to upload file"
       );
       console.error("Upload error:", error);
+      onUploadError?.();
     } finally {
       setIsUploading(false);
+      setProgressMessage(null);
       if (fileInputRef.current) {
         fileInputRef.current.value = "";
       }
@@ -94,7 +139,7 @@ export default function UploadButton({
           {isUploading ? (
             <>
               <div className="w-5 h-5 border-2 border-purple-500 border-t-transparent rounded-full animate-spin" />
-              <span>Uploading...</span>
+              <span>{progressMessage ?? "Uploading..."}</span>
             </>
           ) : (
             <>
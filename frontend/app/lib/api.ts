@@ -25,26 +25,54 @@ export async function fetchWrappedData(): Promise<WrappedData> {
   }
 }
 
-export async function uploadCSV(file: File): Promise<{ status: string; message: string; journey_count: number }> {
+export type UploadStreamEvent =
+  | { event: 'progress'; stage: string; rows?: number; completed?: number; total?: number }
+  | { event: 'metrics'; partial: boolean; data: WrappedData }
+  | { event: 'section'; name: string; data: Partial<WrappedData> }
+  | { event: 'complete'; filename: string; journey_count: number }
+  | { event: 'error'; stage?: string; detail: string }
+
+export async function uploadCSVStream(
+  file: File,
+  onEvent: (event: UploadStreamEvent) => void
+): Promise<void> {
   try {
     const formData = new FormData()
     formData.append('file', file)
 
-    const response = await fetch(`${API_BASE_URL}/upload`, {
+    const response = await fetch(`${API_BASE_URL}/upload/stream`, {
       method: 'POST',
       body: formData,
     })
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       const error = await response.json()
       throw new Error(error.detail || `Failed to upload CSV: ${response.statusText}`)
     }
 
-    const data = await response.json()
-    return data
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop() ?? ''
+
+      for (const line of lines) {
+        if (!line.trim()) continue
+        const event = JSON.parse(line) as UploadStreamEvent
+        if (event.event === 'error') {
+          throw new Error(event.detail)
+        }
+        onEvent(event)
+      }
+    }
   } catch (error) {
     console.error('Error uploading CSV:', error)
     throw error
   }
 }
-
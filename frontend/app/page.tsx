@@ -15,14 +15,24 @@ export default function Home() {
   const [data, setData] = useState<WrappedData | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [linesLoading, setLinesLoading] = useState(false);
+  const [progressMessage, setProgressMessage] = useState<string | null>(null);
 
   const handleUploadStart = () => {
     setLoading(true);
     setError(null);
+    setProgressMessage(null);
   };
 
-  const handleUploadSuccess = (newData: WrappedData) => {
+  // Called first with partial data, then again once line inference is done
+  const handleUploadSuccess = (newData: WrappedData, partial: boolean) => {
     setData(newData);
+    setLinesLoading(partial);
+    setLoading(false);
+  };
+
+  const handleUploadError = () => {
+    setLinesLoading(false);
     setLoading(false);
   };
 
@@ -37,6 +47,9 @@ export default function Home() {
         >
           <div className="w-16 h-16 border-4 border-purple-400 border-t-transparent rounded-full animate-spin mx-auto mb-4"></div>
           <p className="text-xl text-gray-700">Processing your TFL data...</p>
+          {progressMessage && (
+            <p className="text-sm text-gray-500 mt-2">{progressMessage}</p>
+          )}
         </motion.div>
       </div>
     );
@@ -52,6 +65,8 @@ export default function Home() {
         <UploadButton
           onUploadSuccess={handleUploadSuccess}
           onUploadStart={handleUploadStart}
+          onUploadProgress={setProgressMessage}
+          onUploadError={handleUploadError}
         />
       </main>
     );
@@ -68,6 +83,9 @@ export default function Home() {
           >
             <div className="w-16 h-16 border-4 border-purple-400 border-t-transparent rounded-full animate-spin mx-auto mb-4"></div>
             <p className="text-xl text-gray-700">Processing new data...</p>
+            {progressMessage && (
+              <p className="text-sm text-gray-500 mt-2">{progressMessage}</p>
+            )}
           </motion.div>
         </div>
       )}
@@ -75,12 +93,14 @@ export default function Home() {
       <UploadButton
         onUploadSuccess={handleUploadSuccess}
         onUploadStart={handleUploadStart}
+        onUploadProgress={setProgressMessage}
+        onUploadError={handleUploadError}
       />
 
       {data && (
         <>
           <SummarySection data={data} />
-          <TubeLinesSection data={data} />
+          <TubeLinesSection data={data} loading={linesLoading} />
           <DailySpendingSection data={data} />
           <HourlyPatternSection data={data} />
         </>
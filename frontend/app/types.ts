@@ -47,6 +47,14 @@ export interface WrappedData {
     date: string
     journey_count: number
   }
+  trips: {
+    total_trips: number
+    multi_leg_trips: number
+    average_door_to_door_minutes: number
+    average_cost_per_trip: number
+    return_trips: number
+    hopper_savings: number
+  }
   top_lines: Array<{
     line: string
     count: number